@@ -2,9 +2,40 @@ import streamlit as st
 import whisper
 import tempfile
 import os
-from moviepy.editor import VideoFileClip
+import gc
+import hashlib
+import io
+import json
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import numpy as np
+import pandas as pd
 import torch
 import warnings
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import av
+except ImportError:
+    av = None
+try:
+    import torchaudio
+except ImportError:
+    torchaudio = None
+try:
+    import ctranslate2
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+    from faster_whisper.vad import get_speech_timestamps
+except ImportError:
+    ctranslate2 = BatchedInferencePipeline = WhisperModel = get_speech_timestamps = None
+try:
+    from tensorrt_llm.runtime import ModelRunnerCpp
+except ImportError:
+    ModelRunnerCpp = None
 warnings.filterwarnings("ignore")
 
 # Configure page
@@ -44,48 +75,590 @@ selected_language = st.sidebar.selectbox(
 )
 
 # Model selection
+MODEL_SIZES = ["tiny", "base", "small", "medium", "large"]
+DEFAULT_MODEL = "small"
+
 model_size = st.sidebar.selectbox(
     "Select Model Size",
-    options=["tiny", "base", "small", "medium", "large"],
-    index=2,
+    options=MODEL_SIZES,
+    index=MODEL_SIZES.index(DEFAULT_MODEL),
     help="Larger models are more accurate but slower"
 )
 
+# Run inference on the GPU whenever one is available
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+# Inference backends usable in this environment, fastest first
+BACKENDS = [
+    name for name, available in [
+        ("tensorrt-llm", ModelRunnerCpp is not None and DEVICE == "cuda"),
+        ("faster-whisper", WhisperModel is not None),
+        ("whisper", True)
+    ]
+    if available
+]
+DEFAULT_BACKEND = "faster-whisper" if "faster-whisper" in BACKENDS else "whisper"
+
+# Prebuilt TensorRT-LLM Whisper engine (see build_trt.py)
+TRT_ENGINE_DIR = os.environ.get("WHISPER_TRT_ENGINE_DIR", "whisper_trt_engine")
+
+backend = st.sidebar.selectbox(
+    "Inference Backend",
+    options=BACKENDS,
+    index=BACKENDS.index(DEFAULT_BACKEND),
+    help="TensorRT-LLM needs a prebuilt engine and ignores the model size"
+)
+
+if backend == "tensorrt-llm":
+    engine_dir = st.sidebar.text_input(
+        "TensorRT-LLM Engine Directory",
+        value=TRT_ENGINE_DIR,
+        help="Output directory of build_trt.py"
+    )
+
+# Decoding controls; greedy decoding is the fast default for clean uploads
+MAX_BEAM_SIZE = 5
+
+# Number of 30-second windows decoded together by the batched pipeline
+BATCH_SIZE = 16
+
+high_quality = st.sidebar.checkbox(
+    "High Quality Decoding",
+    value=False,
+    help=f"Beam search with {MAX_BEAM_SIZE} beams; more accurate but slower"
+)
+
+beam_size = st.sidebar.slider(
+    "Beam Size",
+    min_value=1,
+    max_value=MAX_BEAM_SIZE,
+    value=MAX_BEAM_SIZE if high_quality else 1,
+    help="1 decodes greedily, which is the fastest"
+)
+
+batch_size = BATCH_SIZE
+if backend == "faster-whisper":
+    batch_size = st.sidebar.slider(
+        "Batch Size",
+        min_value=1,
+        max_value=32,
+        value=BATCH_SIZE,
+        help="30-second windows decoded together; lower it if the GPU runs out of memory"
+    )
+
+# Models kept resident at once; one on GPU so switching sizes never stacks weights
+MODEL_CACHE_SIZE = 1 if DEVICE == "cuda" else 2
+
 @st.cache_resource
-def load_whisper_model(model_name):
-    """Load and cache the Whisper model"""
-    return whisper.load_model(model_name)
+def _model_cache():
+    """Process-wide LRU of loaded Whisper models"""
+    return {"models": OrderedDict(), "lock": threading.Lock()}
+
+def load_whisper_model(model_name, backend=DEFAULT_BACKEND, cache=None):
+    """Load and cache the Whisper model on the inference device
+
+    For the ``tensorrt-llm`` backend ``model_name`` is the engine directory.
+    Callers off the script thread must pass ``cache`` from ``_model_cache()``.
+    """
+    if cache is None:
+        cache = _model_cache()
+    key = (backend, model_name)
+    with cache["lock"]:
+        models = cache["models"]
+        if key in models:
+            models.move_to_end(key)
+            return models[key]
+
+        # Evict before loading and hand the freed blocks back to the driver
+        evicted = False
+        while len(models) >= MODEL_CACHE_SIZE:
+            models.popitem(last=False)
+            evicted = True
+        if evicted:
+            gc.collect()
+            if DEVICE == "cuda":
+                torch.cuda.empty_cache()
+
+        models[key] = _build_whisper_model(model_name, backend)
+        return models[key]
+
+def _build_whisper_model(model_name, backend):
+    """Instantiate a Whisper model on the inference device"""
+    if backend == "tensorrt-llm":
+        return _build_trt_engine(model_name)
+    if backend == "whisper":
+        model = whisper.load_model(model_name, device=DEVICE)
+        if DEVICE == "cuda" and hasattr(torch, "compile"):
+            # Fuse the encoder's kernels; it always sees a fixed 3000-frame mel.
+            # The decoder stays eager: every decoding task installs fresh
+            # kv-cache hooks, which would recompile it per window. CUDA graphs
+            # ("reduce-overhead") are avoided: their tree manager is thread-local
+            # and decoding runs on a fresh worker thread per transcription.
+            model.encoder = torch.compile(model.encoder)
+        return model
+    # CTranslate2 backend with INT8 weights; bf16 activations where CTranslate2
+    # runs them natively (Ampere and newer), fp16 on older GPUs, and no half
+    # precision on CPU where it only slows down. torch's bf16 check also counts
+    # emulated support, which CTranslate2 rejects on Volta/Turing.
+    if DEVICE == "cuda":
+        supported = ctranslate2.get_supported_compute_types("cuda")
+        compute_type = "int8_bfloat16" if "int8_bfloat16" in supported else "int8_float16"
+    else:
+        compute_type = "int8"
+    return WhisperModel(model_name, device=DEVICE, compute_type=compute_type)
+
+# Decoder token budget per 30-second window for the TensorRT-LLM engine; matches
+# openai-whisper's n_text_ctx // 2, since Indic scripts take ~5-6 tokens per word
+TRT_MAX_NEW_TOKENS = 224
+
+def _build_trt_engine(engine_dir):
+    """Load a prebuilt TensorRT-LLM Whisper encoder/decoder engine"""
+    with open(os.path.join(engine_dir, "encoder", "config.json")) as f:
+        encoder_config = json.load(f)["pretrained_config"]
+    runner = ModelRunnerCpp.from_dir(
+        engine_dir=engine_dir,
+        is_enc_dec=True,
+        max_batch_size=1,
+        max_input_len=3000,
+        max_output_len=TRT_MAX_NEW_TOKENS,
+        max_beam_width=MAX_BEAM_SIZE,
+        kv_cache_free_gpu_memory_fraction=0.9,
+        cross_kv_cache_fraction=0.5
+    )
+    return {
+        "runner": runner,
+        "n_mels": encoder_config["n_mels"],
+        "num_languages": encoder_config["num_languages"]
+    }
+
+@st.cache_resource
+def _preload_default_model():
+    """Load the default model in the background once per server process"""
+    thread = threading.Thread(
+        target=load_whisper_model,
+        # The thread has no script context to look up the cached LRU itself
+        args=(DEFAULT_MODEL, DEFAULT_BACKEND, _model_cache()),
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+# Warm the model while the user is still uploading their video. The
+# openai-whisper backend is still built fully on the CPU before moving to
+# DEVICE; skipping that (accelerate.init_empty_weights) is out of scope.
+_preload_default_model()
+
+# Whisper expects 16 kHz mono float32 samples
+SAMPLE_RATE = 16000
+
+def extract_audio_array(video_path):
+    """Decode the audio track of a video into a 16 kHz mono float32 array"""
+    if shutil.which("ffmpeg") is None:
+        if av is not None:
+            return _extract_audio_array_pyav(video_path)
+        return _extract_audio_array_torchaudio(video_path)
+
+    proc = subprocess.Popen(_ffmpeg_pcm_command(video_path), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        message = err.decode(errors="ignore").strip().splitlines()
+        raise RuntimeError(message[-1] if message else "ffmpeg failed to decode audio")
+    return np.frombuffer(out, dtype=np.float32)
+
+def extract_audio_array_from_stream(stream):
+    """Decode audio from a file-like object piped into ffmpeg's stdin
+
+    Returns None when ffmpeg is missing, when the upload is MP4/MOV with the
+    moov atom after mdat (which cannot be demuxed without seeking), or when
+    ffmpeg fails, so callers can fall back to saving the video and using
+    ``extract_audio_array``.
+    """
+    if shutil.which("ffmpeg") is None:
+        return None
+    # ffmpeg would read the whole upload through the pipe before failing on
+    # these, so go straight to the file path instead of decoding twice
+    if hasattr(stream, "getbuffer") and _moov_after_mdat(stream.getbuffer()):
+        return None
+
+    proc = subprocess.Popen(
+        _ffmpeg_pcm_command("pipe:0"),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+
+    def feed():
+        try:
+            stream.seek(0)
+            shutil.copyfileobj(stream, proc.stdin, length=1024 * 1024)
+        except OSError:
+            # ffmpeg stopped reading early; its exit code tells us why
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    # Write the upload on one thread while draining PCM on this one so
+    # neither pipe fills up and blocks ffmpeg
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    out = proc.stdout.read()
+    proc.wait()
+    feeder.join()
+
+    if proc.returncode != 0 or not out:
+        return None
+    return np.frombuffer(out, dtype=np.float32)
+
+# Top-level boxes an MP4/MOV file can start with
+MP4_LEADING_BOXES = (b"ftyp", b"wide", b"free", b"skip", b"mdat", b"moov")
+
+def _moov_after_mdat(data):
+    """Whether ``data`` is ISO-BMFF (MP4/MOV) with its index after the media
+
+    Walks the top-level boxes from the start of the file. Such files cannot
+    be demuxed front to back; faststart MP4 (moov first) and non-MP4
+    containers like MKV/WebM, FLV and AVI can.
+    """
+    offset = 0
+    first = True
+    while offset + 8 <= len(data):
+        size, box_type = struct.unpack(">I4s", data[offset:offset + 8])
+        # Classic QuickTime files often open with wide/free/mdat and no ftyp
+        if first and box_type not in MP4_LEADING_BOXES:
+            return False
+        first = False
+        if box_type == b"moov":
+            return False
+        if box_type == b"mdat":
+            return True
+        if size == 1:
+            # 64-bit size follows the type
+            if offset + 16 > len(data):
+                return False
+            size = struct.unpack(">Q", data[offset + 8:offset + 16])[0]
+        elif size == 0:
+            # Box runs to the end of the file
+            return False
+        if size < 8:
+            return False
+        offset += size
+    return False
+
+def _ffmpeg_pcm_command(source):
+    """ffmpeg arguments decoding ``source`` to 16 kHz mono f32le on stdout"""
+    # Map only the first audio stream so video, subtitle and extra audio
+    # tracks are never decoded; ffmpeg resamples to Whisper's input format
+    return [
+        "ffmpeg", "-nostdin", "-i", source,
+        "-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "f32le", "-acodec", "pcm_f32le", "-"
+    ]
+
+def _extract_audio_array_pyav(video_path):
+    """Fallback audio decoder for environments without the ffmpeg CLI"""
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+    chunks = []
+    with av.open(video_path) as container:
+        for frame in container.decode(audio=0):
+            for resampled in resampler.resample(frame):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+        for resampled in resampler.resample(None):
+            chunks.append(resampled.to_ndarray().reshape(-1))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32, copy=False)
+
+def _extract_audio_array_torchaudio(video_path):
+    """Last-resort audio decoder using torchaudio's own backends"""
+    if torchaudio is None:
+        raise RuntimeError("None of the ffmpeg CLI, PyAV or torchaudio is available")
+
+    waveform, sample_rate = torchaudio.load(video_path)
+    waveform = torchaudio.functional.resample(waveform.mean(0), sample_rate, SAMPLE_RATE)
+    return waveform.numpy().astype(np.float32, copy=False)
 
 def extract_audio_from_video(video_file):
-    """Extract audio from video file"""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
-        temp_audio_path = temp_audio.name
-    
+    """Extract audio from video file as an array Whisper can consume directly"""
     try:
-        # Load video and extract audio
-        video = VideoFileClip(video_file)
-        audio = video.audio
-        audio.write_audiofile(temp_audio_path, verbose=False, logger=None)
-        video.close()
-        audio.close()
-        return temp_audio_path
+        return extract_audio_array(video_file)
     except Exception as e:
         st.error(f"Error extracting audio: {str(e)}")
         return None
 
-def transcribe_audio(audio_path, model, language_code):
-    """Transcribe audio using Whisper"""
+def transcribe_audio(audio, model, backend, language_code, on_segment=None,
+                     beam_size=1, batch_size=BATCH_SIZE):
+    """Transcribe a 16 kHz mono float32 audio array using Whisper
+
+    Decoding runs on a worker thread; ``on_segment`` is called on the
+    script thread with each new segment and the text transcribed so far.
+    The worker is told to stop if this call exits early, e.g. when a widget
+    change or Stop interrupts the script run.
+    """
+    segment_queue = queue.Queue()
+    cancelled = threading.Event()
+    # Cached resources need the script thread's context, so fetch the stream here
+    copy_stream = _copy_stream() if backend == "tensorrt-llm" else None
+    worker = threading.Thread(
+        target=run_transcription,
+        args=(audio, model, backend, language_code, segment_queue, cancelled,
+              beam_size, batch_size, copy_stream),
+        daemon=True
+    )
+    worker.start()
+
+    segments = []
+    text_parts = []
     try:
+        while True:
+            try:
+                item = segment_queue.get(timeout=0.1)
+            except queue.Empty:
+                if not worker.is_alive() and segment_queue.empty():
+                    break
+                continue
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                st.error(f"Error during transcription: {str(item)}")
+                return None
+            segments.append(item)
+            text_parts.append(item['text'])
+            if on_segment is not None:
+                on_segment(item, "".join(text_parts))
+    finally:
+        cancelled.set()
+
+    truncated = [segment for segment in segments if segment.get('truncated')]
+    if truncated:
+        st.warning(
+            f"{len(truncated)} window(s) reached the decoder token limit and may be "
+            "missing text at the end; rebuild the engine with a larger token budget"
+        )
+
+    return {"text": "".join(text_parts), "segments": segments}
+
+def run_transcription(audio, model, backend, language_code, segment_queue, cancelled,
+                      beam_size=1, batch_size=BATCH_SIZE, copy_stream=None):
+    """Push transcribed segments onto a queue, ending with ``None``
+
+    Stops between segments once ``cancelled`` is set. openai-whisper decodes
+    the whole file in one call, so it can only stop after that call returns.
+    """
+    segment_iter = iter_segments(
+        audio, model, backend, language_code, beam_size, batch_size, copy_stream
+    )
+    try:
+        for segment in segment_iter:
+            if cancelled.is_set():
+                break
+            segment_queue.put(segment)
+    except Exception as e:
+        segment_queue.put(e)
+    finally:
+        # Close the generator so the backend stops decoding and drops its
+        # reference to the model
+        segment_iter.close()
+        segment_queue.put(None)
+
+def iter_segments(audio, model, backend, language_code, beam_size=1, batch_size=BATCH_SIZE,
+                  copy_stream=None):
+    """Yield Whisper-style segment dicts as the model produces them
+
+    ``copy_stream`` is the CUDA stream the TensorRT-LLM backend uploads mel
+    windows on.
+    """
+    if backend == "faster-whisper":
+        # VAD-split the audio and decode the speech windows in batches
+        pipeline = BatchedInferencePipeline(model=model)
+        segment_iter, _ = pipeline.transcribe(
+            audio,
+            language=language_code,
+            beam_size=beam_size,
+            best_of=beam_size,
+            batch_size=batch_size
+        )
+        for segment in segment_iter:
+            yield {"start": segment.start, "end": segment.end, "text": segment.text}
+        return
+
+    # Only decode speech, then map timestamps back onto the original audio
+    speech, offsets = drop_silence(audio)
+    if backend == "tensorrt-llm":
+        segment_iter = _iter_segments_trt(speech, model, language_code, copy_stream, beam_size)
+    else:
+        segment_iter = _iter_segments_whisper(speech, model, language_code, beam_size)
+    for segment in segment_iter:
+        yield {
+            **segment,
+            "start": restore_time(segment['start'], offsets),
+            "end": restore_time(segment['end'], offsets, is_end=True)
+        }
+
+def drop_silence(audio):
+    """Cut silent regions out of ``audio`` with Silero VAD
+
+    Returns the concatenated speech and an offset map of the sample where
+    each kept region starts in the speech and in the original audio.
+    """
+    if get_speech_timestamps is None or len(audio) == 0:
+        return audio, ([0], [0])
+
+    regions = get_speech_timestamps(audio, sampling_rate=SAMPLE_RATE)
+    if not regions:
+        return audio[:0], ([0], [0])
+
+    speech_starts = []
+    original_starts = []
+    kept = 0
+    for region in regions:
+        speech_starts.append(kept)
+        original_starts.append(region['start'])
+        kept += region['end'] - region['start']
+    speech = np.concatenate([audio[region['start']:region['end']] for region in regions])
+    return speech, (speech_starts, original_starts)
+
+def restore_time(seconds, offsets, is_end=False):
+    """Map a time in the speech-only audio back to the original audio"""
+    speech_starts, original_starts = offsets
+    sample = seconds * SAMPLE_RATE
+    # An end time on a region boundary belongs to the region before it
+    find = bisect_left if is_end else bisect_right
+    index = max(find(speech_starts, sample) - 1, 0)
+    return (sample - speech_starts[index] + original_starts[index]) / SAMPLE_RATE
+
+@st.cache_resource
+def _copy_stream():
+    """Dedicated CUDA stream for host-to-device mel uploads"""
+    return torch.cuda.Stream()
+
+def _stage_mel_window(audio, offset, n_mels, staging, stream):
+    """Compute one window's log-mel on the CPU and queue its upload
+
+    The mel is written into a pinned ``staging`` buffer and copied on
+    ``stream`` without blocking; wait on the returned event before use.
+    """
+    window = whisper.audio.N_SAMPLES
+    # Runs on the staging worker, so enter inference mode on that thread
+    with torch.inference_mode():
+        chunk = whisper.pad_or_trim(torch.from_numpy(np.array(audio[offset:offset + window])))
+        mel = whisper.log_mel_spectrogram(chunk, n_mels)
+        staging.copy_(mel.transpose(0, 1))
+        with torch.cuda.stream(stream):
+            features = staging.to(DEVICE, non_blocking=True).unsqueeze(0)
+        ready = torch.cuda.Event()
+        ready.record(stream)
+    return features, ready
+
+def _iter_segments_whisper(audio, model, language_code, beam_size=1):
+    """Transcribe with openai-whisper, which returns segments all at once"""
+    # Cheaper than the no_grad inside transcribe: no version counters or view tracking
+    with torch.inference_mode():
         result = model.transcribe(
-            audio_path, 
+            audio, 
             language=language_code,
-            fp16=False,
-            verbose=False
+            fp16=(DEVICE == "cuda"),
+            # Whisper decodes greedily when no beam size is given
+            beam_size=beam_size if beam_size > 1 else None,
+            best_of=beam_size,
+            verbose=None
         )
-        return result
-    except Exception as e:
-        st.error(f"Error during transcription: {str(e)}")
+    yield from result['segments']
+
+def _iter_segments_trt(audio, engine, language_code, stream, beam_size=1):
+    """Decode each 30-second window with the TensorRT-LLM engine"""
+    tokenizer = whisper.tokenizer.get_tokenizer(
+        multilingual=True,
+        num_languages=engine["num_languages"],
+        language=language_code,
+        task="transcribe"
+    )
+    prompt = torch.tensor([tokenizer.sot_sequence_including_notimestamps], dtype=torch.int32)
+    window = whisper.audio.N_SAMPLES
+    offsets = range(0, len(audio), window)
+    if not offsets:
+        return
+
+    # Two pinned window-sized buffers: a worker thread computes the next
+    # window's mel and uploads it from one on the copy stream while the
+    # current window decodes from the other
+    staging = [
+        torch.empty((whisper.audio.N_FRAMES, engine["n_mels"]), dtype=torch.float16, pin_memory=True)
+        for _ in range(2)
+    ]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(_stage_mel_window, audio, offsets[0], engine["n_mels"], staging[0], stream)
+
+        for index, offset in enumerate(offsets):
+            features, ready = pending.result()
+            if index + 1 < len(offsets):
+                # Safe to refill: the buffer's previous upload was waited on last window
+                pending = executor.submit(
+                    _stage_mel_window,
+                    audio, offsets[index + 1], engine["n_mels"], staging[(index + 1) % 2], stream
+                )
+            ready.synchronize()
+            with torch.inference_mode():
+                outputs = engine["runner"].generate(
+                    batch_input_ids=prompt,
+                    encoder_input_features=features,
+                    encoder_output_lengths=torch.tensor([features.shape[1] // 2], dtype=torch.int32),
+                    max_new_tokens=TRT_MAX_NEW_TOKENS,
+                    end_id=tokenizer.eot,
+                    pad_id=tokenizer.eot,
+                    num_beams=beam_size,
+                    output_sequence_lengths=True,
+                    return_dict=True
+                )
+            length = int(outputs["sequence_lengths"][0][0])
+            tokens = outputs["output_ids"][0][0][:length].tolist()
+            # Drop the prompt and any special tokens, which all sort after EOT
+            text = tokenizer.decode([token for token in tokens if token < tokenizer.eot])
+            if text.strip():
+                yield {
+                    "start": offset / SAMPLE_RATE,
+                    "end": min(offset + window, len(audio)) / SAMPLE_RATE,
+                    "text": text,
+                    # Hitting the token budget means the rest of the window was cut off;
+                    # the sequence length also counts the prompt tokens
+                    "truncated": length - prompt.shape[1] >= TRT_MAX_NEW_TOKENS
+                }
+
+# Decoded uploads remembered per session so language/model changes skip ffmpeg
+AUDIO_CACHE_SIZE = 2
+
+def audio_cache_key(uploaded_file):
+    """Content hash identifying an uploaded video"""
+    return hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
+
+def get_cached_audio(key):
+    """Return previously decoded audio for this session, or None"""
+    audio_cache = st.session_state.setdefault("audio_cache", OrderedDict())
+    if key not in audio_cache:
         return None
+    audio_cache.move_to_end(key)
+    return audio_cache[key]
+
+def cache_audio(key, audio):
+    """Remember decoded audio, evicting the least recently used upload"""
+    audio_cache = st.session_state.setdefault("audio_cache", OrderedDict())
+    audio_cache[key] = audio
+    audio_cache.move_to_end(key)
+    while len(audio_cache) > AUDIO_CACHE_SIZE:
+        audio_cache.popitem(last=False)
+
+def format_times_srt(seconds):
+    """Format an array of times in seconds for SRT subtitle format"""
+    millis = np.round(np.asarray(seconds, dtype=np.float64) * 1000).astype(np.int64)
+    secs, millis = np.divmod(millis, 1000)
+    minutes, secs = np.divmod(secs, 60)
+    hours, minutes = np.divmod(minutes, 60)
+    return [
+        f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+        for h, m, s, ms in zip(hours.tolist(), minutes.tolist(), secs.tolist(), millis.tolist())
+    ]
 
 # Main interface
 uploaded_file = st.file_uploader(
@@ -107,39 +680,73 @@ if uploaded_file is not None:
     with col2:
         st.write(f"**Selected language:** {selected_language}")
         st.write(f"**Model size:** {model_size}")
+        st.write(f"**Backend:** {backend}")
     
     if st.button("🚀 Start Transcription", type="primary"):
         progress_bar = st.progress(0)
         status_text = st.empty()
         
+        temp_video_path = None
         try:
-            # Step 1: Save uploaded file
-            status_text.text("📁 Saving video file...")
-            progress_bar.progress(10)
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as temp_video:
-                temp_video.write(uploaded_file.read())
-                temp_video_path = temp_video.name
+            audio_key = audio_cache_key(uploaded_file)
+            audio = get_cached_audio(audio_key)
             
-            # Step 2: Extract audio
-            status_text.text("🎵 Extracting audio from video...")
-            progress_bar.progress(30)
-            
-            audio_path = extract_audio_from_video(temp_video_path)
+            if audio is None:
+                # Step 1: Extract audio straight from the upload
+                status_text.text("🎵 Extracting audio from video...")
+                progress_bar.progress(20)
+                
+                audio = extract_audio_array_from_stream(uploaded_file)
+                
+                if audio is None:
+                    # Step 2: Container needs seeking, so decode from a saved copy
+                    status_text.text("📁 Saving video file...")
+                    progress_bar.progress(30)
+                    
+                    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as temp_video:
+                        # Stream in 1 MiB chunks instead of reading the whole upload into memory
+                        uploaded_file.seek(0)
+                        shutil.copyfileobj(uploaded_file, temp_video, length=1024 * 1024)
+                        temp_video_path = temp_video.name
+                    
+                    status_text.text("🎵 Extracting audio from video...")
+                    progress_bar.progress(40)
+                    
+                    audio = extract_audio_from_video(temp_video_path)
+                    
+                    # Cleanup temporary files
+                    os.unlink(temp_video_path)
+                
+                if audio is not None:
+                    cache_audio(audio_key, audio)
             
-            if audio_path:
+            if audio is not None:
                 # Step 3: Load model
                 status_text.text("🤖 Loading AI model...")
                 progress_bar.progress(50)
                 
-                model = load_whisper_model(model_size)
+                model_name = engine_dir if backend == "tensorrt-llm" else model_size
+                model = load_whisper_model(model_name, backend)
                 
                 # Step 4: Transcribe
                 status_text.text("🎯 Transcribing audio...")
                 progress_bar.progress(70)
                 
                 language_code = INDIC_LANGUAGES[selected_language]
-                result = transcribe_audio(audio_path, model, language_code)
+                duration = max(len(audio) / SAMPLE_RATE, 1e-6)
+                partial_text = st.empty()
+                
+                def show_progress(segment, text):
+                    progress_bar.progress(min(95, 70 + int(segment['end'] / duration * 25)))
+                    partial_text.text(text)
+                
+                result = transcribe_audio(
+                    audio, model, backend, language_code,
+                    on_segment=show_progress,
+                    beam_size=beam_size,
+                    batch_size=batch_size
+                )
+                partial_text.empty()
                 
                 if result:
                     progress_bar.progress(100)
@@ -161,16 +768,23 @@ if uploaded_file is not None:
                     if 'segments' in result:
                         st.subheader("⏰ Timestamped Segments")
                         
-                        segments_data = []
-                        for segment in result['segments']:
-                            start_time = f"{int(segment['start'] // 60):02d}:{int(segment['start'] % 60):02d}"
-                            end_time = f"{int(segment['end'] // 60):02d}:{int(segment['end'] % 60):02d}"
-                            segments_data.append({
-                                "Time": f"{start_time} - {end_time}",
-                                "Text": segment['text'].strip()
-                            })
+                        # Format all timestamps in one vectorized pass for both the table and the SRT
+                        segments = result['segments']
+                        start_times = format_times_srt([segment['start'] for segment in segments])
+                        end_times = format_times_srt([segment['end'] for segment in segments])
+                        texts = [segment['text'].strip() for segment in segments]
+                        segments_data = pd.DataFrame({
+                            "Start": start_times,
+                            "End": end_times,
+                            "Text": texts
+                        })
+                        
+                        srt_buffer = io.StringIO()
+                        for i, (start_time, end_time, text) in enumerate(zip(start_times, end_times, texts), 1):
+                            srt_buffer.write(f"{i}\n{start_time} --> {end_time}\n{text}\n\n")
+                        srt_content = srt_buffer.getvalue()
                         
-                        st.dataframe(segments_data, use_container_width=True)
+                        st.dataframe(segments_data, use_container_width=True, hide_index=True)
                     
                     # Download options
                     st.subheader("💾 Download Options")
@@ -188,36 +802,20 @@ if uploaded_file is not None:
                     with col2:
                         # Download as SRT (subtitle file)
                         if 'segments' in result:
-                            srt_content = ""
-                            for i, segment in enumerate(result['segments'], 1):
-                                start_time = format_time_srt(segment['start'])
-                                end_time = format_time_srt(segment['end'])
-                                srt_content += f"{i}\n{start_time} --> {end_time}\n{segment['text'].strip()}\n\n"
-                            
                             st.download_button(
                                 label="🎬 Download as SRT",
                                 data=srt_content,
                                 file_name=f"subtitles_{selected_language.lower()}.srt",
                                 mime="text/plain"
                             )
-                
-                # Cleanup temporary files
-                if os.path.exists(temp_video_path):
-                    os.unlink(temp_video_path)
-                if os.path.exists(audio_path):
-                    os.unlink(audio_path)
                     
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
             progress_bar.empty()
             status_text.empty()
-
-def format_time_srt(seconds):
-    """Format time for SRT subtitle format"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}".replace('.', ',')
+        finally:
+            if temp_video_path and os.path.exists(temp_video_path):
+                os.unlink(temp_video_path)
 
 # Footer
 st.markdown("---")
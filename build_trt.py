@@ -0,0 +1,93 @@
+"""Build a TensorRT-LLM Whisper engine for the ``tensorrt-llm`` backend of app.py
+
+Wraps the two steps from TensorRT-LLM's ``examples/whisper`` recipe:
+
+    python convert_checkpoint.py --model_dir assets --model_name large-v3 \
+        --output_dir whisper_trt_ckpt --dtype float16 \
+        --use_weight_only --weight_only_precision int8
+    trtllm-build --checkpoint_dir whisper_trt_ckpt/encoder \
+        --output_dir whisper_trt_engine/encoder ...
+    trtllm-build --checkpoint_dir whisper_trt_ckpt/decoder \
+        --output_dir whisper_trt_engine/decoder ...
+
+Usage:
+
+    python build_trt.py --convert-script /path/to/TensorRT-LLM/examples/whisper/convert_checkpoint.py \
+        --model-dir assets --model-name large-v3
+
+Point the app at the result with the ``WHISPER_TRT_ENGINE_DIR`` environment
+variable or the engine directory field in the sidebar.
+"""
+import argparse
+import os
+import subprocess
+
+# Decoder prompt length and per-window output tokens (app.py TRT_MAX_NEW_TOKENS)
+MAX_INPUT_LEN = 14
+MAX_NEW_TOKENS = 224
+
+
+def run(cmd):
+    """Echo and run a build command, stopping on failure"""
+    print(" ".join(cmd))
+    subprocess.run(cmd, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a TensorRT-LLM Whisper engine")
+    parser.add_argument("--convert-script", required=True,
+                        help="Path to TensorRT-LLM's examples/whisper/convert_checkpoint.py")
+    parser.add_argument("--model-dir", default="assets",
+                        help="Directory holding the OpenAI Whisper .pt checkpoint")
+    parser.add_argument("--model-name", default="large-v3")
+    parser.add_argument("--checkpoint-dir", default="whisper_trt_ckpt")
+    parser.add_argument("--output-dir", default="whisper_trt_engine")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--no-weight-only", action="store_true",
+                        help="Keep FP16 weights instead of INT8 weight-only quantization")
+    args = parser.parse_args()
+
+    convert = [
+        "python", args.convert_script,
+        "--model_dir", args.model_dir,
+        "--model_name", args.model_name,
+        "--output_dir", args.checkpoint_dir,
+        "--dtype", "float16"
+    ]
+    if not args.no_weight_only:
+        convert += ["--use_weight_only", "--weight_only_precision", "int8"]
+    run(convert)
+
+    # Encoder consumes a full 30-second mel window (3000 frames)
+    run([
+        "trtllm-build",
+        "--checkpoint_dir", os.path.join(args.checkpoint_dir, "encoder"),
+        "--output_dir", os.path.join(args.output_dir, "encoder"),
+        "--moe_plugin", "disable",
+        "--max_batch_size", str(args.max_batch_size),
+        "--gemm_plugin", "disable",
+        "--bert_attention_plugin", "float16",
+        "--max_input_len", "3000",
+        "--max_seq_len", "3000"
+    ])
+
+    # Decoder takes the short task prompt and attends over the encoder output;
+    # the sequence budget covers the prompt plus app.py's TRT_MAX_NEW_TOKENS
+    run([
+        "trtllm-build",
+        "--checkpoint_dir", os.path.join(args.checkpoint_dir, "decoder"),
+        "--output_dir", os.path.join(args.output_dir, "decoder"),
+        "--moe_plugin", "disable",
+        "--max_beam_width", "5",
+        "--max_batch_size", str(args.max_batch_size),
+        "--max_seq_len", str(MAX_INPUT_LEN + MAX_NEW_TOKENS),
+        "--max_input_len", str(MAX_INPUT_LEN),
+        "--max_encoder_input_len", "3000",
+        "--gemm_plugin", "float16",
+        "--bert_attention_plugin", "float16",
+        "--gpt_attention_plugin", "float16"
+    ])
+
+
+if __name__ == "__main__":
+    main()